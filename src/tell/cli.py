@@ -3,15 +3,27 @@
 
 from __future__ import annotations
 
+import atexit
+import bisect
+import functools
 import os
 import platform
+import re
+import signal
 import subprocess
-from typing import Optional, Tuple, List, Dict
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import StringIO
+from typing import NoReturn, Optional, Tuple, List, Dict
 
 import typer
 from rich.console import Console
+from rich.live import Live
 from rich.prompt import Confirm, Prompt
 from rich.syntax import Syntax
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
 
 # --- NEW IMPORTS ---
 from tell.utils import load_history, save_history, clear_history
@@ -26,66 +38,183 @@ try:
 except Exception:
     Groq = None  # type: ignore[assignment]
 
+try:
+    import httpx
+except Exception:
+    httpx = None  # type: ignore[assignment]
+
 app = typer.Typer(add_completion=False, help="Convert natural language to commands via Groq.")
 console = Console()
 
+MODEL = "openai/gpt-oss-20b"
+MAX_CONTEXT_PAIRS = 3  # Past user/assistant pairs sent with each request
+
+_GROQ_CLIENT: Optional[Groq] = None
+# Background workers for disk I/O that can overlap with client setup.
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tell")
+# A single worker serializes every history file access, so a load or clear
+# queued after a save always sees that save's result.
+_HISTORY_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tell-history")
+atexit.register(_HISTORY_EXECUTOR.shutdown, wait=True)
+
 if load_dotenv:
     load_dotenv()
 
 
+# Resolved once at import; neither changes for the lifetime of the process.
+_OS_NAME: Optional[str] = "Linux" if platform.system().lower().startswith("linux") else None
+_SHELL_PATH = os.environ.get("SHELL", "/bin/bash")
+_SHELL_NAME = os.path.basename(_SHELL_PATH).lower()
+
+# Optional opening fence (with info string), the command, optional closing fence.
+_FENCE_RE = re.compile(r"\A\s*(?:```(?:[^\n`]*\n)?)?(.*?)(?:```)?\s*\Z", re.DOTALL)
+
+# Resolved once so rendering does not repeat Pygments' registry and style lookups.
+_BASH_LEXER = get_lexer_by_name("bash")
+_ZSH_LEXER = get_lexer_by_name("zsh")
+_SYNTAX_THEME = Syntax.get_theme("monokai")
+
+# Prefix of the directory listing carried by user messages.
+_CONTEXT_TAG = "[cwd files: "
+
+# Last directory listing, keyed on (cwd, directory mtime in ns, max_files).
+_DIR_CACHE: Optional[Tuple[Tuple[str, int, int], str]] = None
+
+
 def detect_os() -> str:
-    system = platform.system().lower()
-    if system.startswith("linux"):
-        return "Linux"
+    if _OS_NAME is not None:
+        return _OS_NAME
     console.print("[red]This tool currently supports Linux only.[/red]")
     raise typer.Exit(code=1)
 
 
 def detect_shell() -> Tuple[str, str]:
-    shell_path = os.environ.get("SHELL", "/bin/bash")
-    return os.path.basename(shell_path).lower(), shell_path
+    return _SHELL_NAME, _SHELL_PATH
+
+
+def _scan_directory(max_files: int) -> str:
+    # Keep only the alphabetically first `max_files` names instead of
+    # collecting and sorting the whole directory.
+    files: List[str] = []
+    total = 0
+    with os.scandir(".") as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            total += 1
+            if len(files) < max_files:
+                bisect.insort(files, name)
+            elif files and name < files[-1]:
+                bisect.insort(files, name)
+                files.pop()
+    if total > max_files:
+        return ", ".join(files) + f", ... (+{total - max_files} more)"
+    if not files:
+        return "(Empty Directory)"
+    return ", ".join(files)
 
 
 def get_directory_context(max_files: int = 50) -> str:
     """Returns a comma-separated list of filenames in the current directory."""
+    global _DIR_CACHE
     try:
-        files = [f for f in os.listdir(".") if not f.startswith(".")]
-        files.sort()
-        if len(files) > max_files:
-            return ", ".join(files[:max_files]) + f", ... (+{len(files) - max_files} more)"
-        if not files:
-            return "(Empty Directory)"
-        return ", ".join(files)
+        # Adding, removing or renaming an entry bumps the directory's mtime,
+        # so an unchanged (cwd, mtime) pair means the listing is still valid.
+        key = (os.getcwd(), os.stat(".").st_mtime_ns, max_files)
+        if _DIR_CACHE is not None and _DIR_CACHE[0] == key:
+            return _DIR_CACHE[1]
+        listing = _scan_directory(max_files)
+        _DIR_CACHE = (key, listing)
+        return listing
     except Exception:
         return "(Could not read directory)"
 
 
-def build_system_prompt(os_name: str, shell_name: str, file_context: str) -> str:
+@functools.lru_cache(maxsize=None)
+def build_system_prompt(os_name: str, shell_name: str) -> str:
+    """Return the invariant system prompt.
+
+    It must not contain anything that varies between requests so that it stays
+    a byte-identical prefix and Groq's prefix cache can skip re-processing it.
+    """
     return (
         "You are a command generator for Linux. Return ONLY the raw command string; "
         "no markdown, no backticks, no explanations. "
         f"Target OS: {os_name}. Shell: {shell_name}. "
-        f"The user is currently in a directory containing these files: [{file_context}]. "
+        "A request may start with the files in the user's current directory as [cwd files: ...]; "
+        "when it does not, the most recent listing still applies. "
         "Use this context to resolve vague requests (e.g., 'make it recursive' refers to previous command)."
     )
 
 
+def split_file_context(content: str) -> Tuple[Optional[str], str]:
+    """Split a user message into its directory listing (if any) and the prompt."""
+    if content.startswith(_CONTEXT_TAG):
+        listing, _, prompt = content[len(_CONTEXT_TAG):].partition("]\n")
+        return listing, prompt
+    return None, content
+
+
+def prune_file_context(
+    history: List[Dict[str, str]], file_context: str
+) -> Tuple[List[Dict[str, str]], bool]:
+    """Strip stale directory listings from `history`.
+
+    The most recent listing is kept only if it still matches `file_context`;
+    every other listing is removed so a request never carries more than one.
+    Returns the pruned history and whether that listing was kept.
+    """
+    pruned: List[Dict[str, str]] = []
+    seen = kept = False
+    for message in reversed(history):
+        listing = None
+        if message.get("role") == "user":
+            listing, bare_prompt = split_file_context(message.get("content", ""))
+        if listing is None:
+            pruned.append(message)
+            continue
+        if not seen and listing == file_context:
+            kept = True
+            pruned.append(message)
+        else:
+            pruned.append({"role": "user", "content": bare_prompt})
+        seen = True
+    pruned.reverse()
+    return pruned, kept
+
+
 def strip_command(command: str) -> str:
-    cleaned = command.strip()
-    if cleaned.startswith("```"):
-        cleaned = "\n".join(cleaned.split("\n")[1:])
-    if cleaned.endswith("```"):
-        cleaned = cleaned.rsplit("```", 1)[0]
-    return cleaned.strip().strip("`")
+    return _FENCE_RE.match(command).group(1).strip().strip("`")
 
 
-def syntax_lexer(shell_name: str) -> str:
+def syntax_lexer(shell_name: str) -> Lexer:
     if shell_name == "zsh":
-        return "zsh"
-    return "bash"
+        return _ZSH_LEXER
+    return _BASH_LEXER
+
+
+def highlight_command(command: str, shell_name: str) -> Syntax:
+    return Syntax(command, syntax_lexer(shell_name), theme=_SYNTAX_THEME, line_numbers=False)
+
+
+def build_http_client() -> Optional["httpx.Client"]:
+    """Return a keep-alive HTTP client, using HTTP/2 when `h2` is installed."""
+    if httpx is None:
+        return None
+    limits = httpx.Limits(keepalive_expiry=300)
+    try:
+        return httpx.Client(http2=True, limits=limits)
+    except ImportError:
+        return httpx.Client(limits=limits)
 
 
 def ensure_groq() -> Groq:
+    """Return the shared Groq client, building it on first use."""
+    global _GROQ_CLIENT
+    if _GROQ_CLIENT is not None:
+        return _GROQ_CLIENT
+
     if Groq is None:
         console.print(
             "[red]Missing dependency:[/red] groq. Install with `pip install -r requirements.txt`."
@@ -97,45 +226,114 @@ def ensure_groq() -> Groq:
         console.print("[red]Missing GROQ_API_KEY.[/red] Set it in your environment and retry.")
         raise typer.Exit(code=1)
 
-    return Groq(api_key=api_key)
+    _GROQ_CLIENT = Groq(api_key=api_key, http_client=build_http_client())
+    return _GROQ_CLIENT
+
+
+def _warmup(os_name: str, shell_name: str) -> None:
+    """Send a one-token request so the connection and system prompt are warm."""
+    try:
+        ensure_groq().chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": build_system_prompt(os_name, shell_name)},
+                {"role": "user", "content": "true"},
+            ],
+            temperature=0,
+            max_tokens=1,
+        )
+    except Exception:
+        # Best effort only; the real request reports any errors.
+        pass
+
+
+def _report_save_error(future: Future[None]) -> None:
+    exc = future.exception()
+    if exc is not None:
+        console.print(f"[yellow]Could not save history:[/yellow] {exc}")
 
 
-def generate_command(prompt: str, os_name: str, shell_name: str) -> str:
+def prefetch_context() -> Future[List[Dict[str, str]]]:
+    """Start loading the next turn's history and warming the directory cache.
+
+    Only the history future is returned: the directory listing is re-validated
+    against the cache when the prompt is sent, so files created while the user
+    was typing are still picked up.
+    """
+    _EXECUTOR.submit(get_directory_context)
+    return _HISTORY_EXECUTOR.submit(load_history)
+
+
+def generate_command(
+    prompt: str,
+    os_name: str,
+    shell_name: str,
+    history_future: Optional[Future[List[Dict[str, str]]]] = None,
+) -> str:
+    # Read the directory and past conversation while the client is prepared.
+    context_future = _EXECUTOR.submit(get_directory_context)
+    if history_future is None:
+        history_future = _HISTORY_EXECUTOR.submit(load_history)
     client = ensure_groq()
-    file_context = get_directory_context()
-    system_prompt = build_system_prompt(os_name, shell_name, file_context)
+
+    file_context = context_future.result()
+    system_prompt = build_system_prompt(os_name, shell_name)
 
     # --- MEMORY LOGIC START ---
     # 1. Load past conversation
-    history = load_history()
+    history = history_future.result()[-MAX_CONTEXT_PAIRS * 2:]
 
     # 2. Build the full message chain: System -> History -> Current User Prompt
+    # The volatile directory listing goes last so everything before it is cacheable.
+    # At most one listing goes out: the latest one in the history window when
+    # the directory is unchanged, otherwise a fresh one on the new message.
+    history, context_in_history = prune_file_context(history, file_context)
+    user_content = prompt.strip()
+    if not context_in_history:
+        user_content = f"{_CONTEXT_TAG}{file_context}]\n{user_content}"
     messages = [{"role": "system", "content": system_prompt}]
     messages.extend(history)
-    messages.append({"role": "user", "content": prompt.strip()})
+    messages.append({"role": "user", "content": user_content})
     # --- MEMORY LOGIC END ---
 
+    # Stream the reply so tokens show up as soon as the model emits them.
+    buffer = StringIO()
     try:
         response = client.chat.completions.create(
-            model="openai/gpt-oss-20b",
+            model=MODEL,
             messages=messages,
             temperature=0,
+            stream=True,
         )
+        with Live(console=console, transient=True) as live:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                buffer.write(delta)
+                live.update(highlight_command(strip_command(buffer.getvalue()), shell_name))
     except Exception as exc:
         console.print(f"[red]Groq API error:[/red] {exc}")
         raise typer.Exit(code=1)
 
-    content = response.choices[0].message.content or ""
-    command = strip_command(content)
+    command = strip_command(buffer.getvalue())
     if not command:
         console.print("[red]No command returned by model.[/red]")
         raise typer.Exit(code=1)
 
     # --- SAVE TO MEMORY ---
-    # Append the new interaction and save it
-    history.append({"role": "user", "content": prompt.strip()})
-    history.append({"role": "assistant", "content": command})
-    save_history(history)
+    # Append only the new interaction; the write happens in the background so
+    # the command is shown without waiting on disk.
+    save_future = _HISTORY_EXECUTOR.submit(
+        save_history,
+        [
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": command},
+        ],
+    )
+    save_future.add_done_callback(_report_save_error)
 
     return command
 
@@ -150,10 +348,33 @@ def run_command(command: str, shell_path: str) -> int:
     return completed.returncode
 
 
+def exec_command(command: str, shell_path: str) -> NoReturn:
+    """Replace this process with the shell running `command`.
+
+    Used when tell exits right after the command anyway: it skips interpreter
+    teardown and the extra process, and the command's exit code becomes ours.
+    """
+    # Nothing runs after exec, so finish pending history writes and output first.
+    _HISTORY_EXECUTOR.shutdown(wait=True)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # Python ignores SIGPIPE and SIGXFSZ, and exec keeps ignored signals. The
+    # shell cannot un-ignore them, so pipelines like `yes | head` would see
+    # EPIPE errors instead of dying quietly. subprocess.run restores them by
+    # default; do the same here.
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    if hasattr(signal, "SIGXFSZ"):
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+    try:
+        os.execvp(shell_path, [shell_path, "-c", command])
+    except FileNotFoundError as exc:
+        console.print(f"[red]Shell not found:[/red] {exc}")
+        raise typer.Exit(code=1)
+
+
 def show_command(command: str, shell_name: str) -> None:
     console.print("[bold]Proposed command:[/bold]")
-    syntax = Syntax(command, syntax_lexer(shell_name), theme="monokai", line_numbers=False)
-    console.print(syntax)
+    console.print(highlight_command(command, shell_name))
 
 
 def handle_prompt(
@@ -162,8 +383,9 @@ def handle_prompt(
     shell_name: str,
     shell_path: str,
     exit_on_abort: bool,
+    history_future: Optional[Future[List[Dict[str, str]]]] = None,
 ) -> None:
-    command = generate_command(prompt, os_name, shell_name)
+    command = generate_command(prompt, os_name, shell_name, history_future)
     show_command(command, shell_name)
 
     if not Confirm.ask("Run this command?", default=False):
@@ -172,15 +394,19 @@ def handle_prompt(
             raise typer.Exit(code=0)
         return
 
+    if exit_on_abort:
+        exec_command(command, shell_path)
+
     exit_code = run_command(command, shell_path)
     if exit_code != 0:
         console.print(f"[red]Command exited with code {exit_code}.[/red]")
-        if exit_on_abort:
-            raise typer.Exit(code=exit_code)
 
 
 def interactive_loop(os_name: str, shell_name: str, shell_path: str) -> None:
     console.print("[bold]Tell[/bold] interactive mode. Type 'exit' or 'quit' to stop.")
+    # Prime the connection and prompt cache while the user types the first task.
+    threading.Thread(target=_warmup, args=(os_name, shell_name), daemon=True).start()
+    history_future = prefetch_context()
     while True:
         try:
             prompt = Prompt.ask("Describe a task")
@@ -195,11 +421,21 @@ def interactive_loop(os_name: str, shell_name: str, shell_path: str) -> None:
 
         # Add support for 'clear' inside interactive mode
         if prompt.strip().lower() == "clear":
-            clear_history()
+            _HISTORY_EXECUTOR.submit(clear_history).result()
             console.print("[green]History cleared.[/green]")
+            history_future = prefetch_context()
             continue
 
-        handle_prompt(prompt, os_name, shell_name, shell_path, exit_on_abort=False)
+        handle_prompt(
+            prompt,
+            os_name,
+            shell_name,
+            shell_path,
+            exit_on_abort=False,
+            history_future=history_future,
+        )
+        # Use the idle time while the user types to prepare the next turn.
+        history_future = prefetch_context()
 
 
 @app.command()
@@ -222,6 +458,8 @@ def main(
 
     os_name = detect_os()
     shell_name, shell_path = detect_shell()
+    # Build the client up-front so the first prompt does not pay for it.
+    ensure_groq()
 
     if interactive or prompt is None:
         interactive_loop(os_name, shell_name, shell_path)
@@ -1,39 +1,90 @@
 """Utility functions for tell."""
 import json
 import os
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Deque
 
-# Define where history lives: ~/.tell/history.json
+try:
+    import orjson
+except Exception:
+    orjson = None  # type: ignore[assignment]
+
+# Define where history lives: ~/.tell/history.jsonl (one message per line)
 HISTORY_DIR = Path.home() / ".tell"
-HISTORY_FILE = HISTORY_DIR / "history.json"
-MAX_HISTORY = 10  # Keep last 10 interactions (5 user, 5 assistant)
+HISTORY_FILE = HISTORY_DIR / "history.jsonl"
+MAX_HISTORY = 5  # Keep last 5 user/assistant pairs
+HISTORY_ROLES = {"user", "assistant"}
+COMPACT_BYTES = 64 * 1024  # Rewrite the file down to its tail past this size
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_tail(maxlen: int) -> Deque[bytes]:
+    """Return the last `maxlen` lines of the history file."""
+    with open(HISTORY_FILE, "rb") as f:
+        return deque(f, maxlen=maxlen)
 
 
 def load_history() -> List[Dict[str, str]]:
-    """Load chat history from the local JSON file."""
-    if not HISTORY_FILE.exists():
-        return []
+    """Load the most recent chat history from the local JSONL file."""
     try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        lines = _read_tail(MAX_HISTORY * 2)
+    except IOError:
         return []
 
+    history = []
+    for line in lines:
+        try:
+            history.append(_loads(line))
+        except ValueError:
+            continue
+    return history
+
 
-def save_history(messages: List[Dict[str, str]]) -> None:
-    """Save the updated chat history, trimming old entries."""
+def save_history(new_messages: List[Dict[str, str]]) -> None:
+    """Append new messages to the history, compacting the file when it grows."""
     # Ensure directory exists
     HISTORY_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Keep only the tail (most recent messages)
-    trimmed_history = messages[-MAX_HISTORY:]
+    # Only conversation turns are stored; system prompts are rebuilt per request.
+    payload = b"".join(
+        _dumps({"role": message["role"], "content": message["content"].strip()}) + b"\n"
+        for message in new_messages
+        if message.get("role") in HISTORY_ROLES
+    )
+    with open(HISTORY_FILE, "a+b") as f:
+        # A crash mid-append can leave a partial last line; start a new line so
+        # the next messages are not merged into it and lost on load.
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload
+        f.write(payload)
+        size = f.tell()
 
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(trimmed_history, f, indent=2)
+    # The file is only re-read once it has grown well past the kept window.
+    if size > COMPACT_BYTES:
+        tail = _read_tail(MAX_HISTORY * 2)
+        # Write the tail to a sibling file and rename it over the history so a
+        # crash mid-write never leaves a truncated file behind.
+        tmp = HISTORY_FILE.with_suffix(".tmp")
+        tmp.write_bytes(b"".join(tail))
+        os.replace(tmp, HISTORY_FILE)
 
 
 def clear_history() -> None:
     """Delete the history file."""
-    if HISTORY_FILE.exists():
-        os.remove(HISTORY_FILE)
+    HISTORY_FILE.unlink(missing_ok=True)